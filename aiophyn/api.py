@@ -6,7 +6,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 import boto3
-from aiohttp import ClientSession, ClientTimeout
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
 from aiohttp.client_exceptions import ClientError, ClientResponseError
 from botocore.exceptions import ClientError as BotocoreClientError
 from pycognito.aws_srp import AWSSRP
@@ -32,6 +32,9 @@ COGNITO_POOL_ID: str = "us-east-1_UAv6IUsyh"
 COGNITO_CLIENT_ID: str = "5q2m8ti0urmepg4lup8q0ptldq"
 
 DEFAULT_TIMEOUT: int = 10
+DEFAULT_LIMIT_PER_HOST: int = 8
+DEFAULT_DNS_CACHE_TTL: int = 300
+DEFAULT_KEEPALIVE_TIMEOUT: int = 75
 
 
 class API:
@@ -52,6 +55,7 @@ class API:
         }
 
         self._session: ClientSession = session
+        self._owns_session: bool = False
         self._iot_id = None
         self._iot_credentials = None
         self.mqtt = None
@@ -128,12 +132,7 @@ class API:
         if not self.verify_ssl:
             kwargs["ssl"] = False
 
-        use_running_session = self._session and not self._session.closed
-
-        if use_running_session:
-            session = self._session
-        else:
-            session = ClientSession(timeout=ClientTimeout(total=DEFAULT_TIMEOUT))
+        session = self._get_session()
 
         try:
             async with session.request(method, url, **kwargs) as resp:
@@ -150,9 +149,26 @@ class API:
             raise RequestError(f"There was an error while requesting {url}") from err
         except ClientError as err:
             raise RequestError(f"There was an error while requesting {url}") from err
-        finally:
-            if not use_running_session:
-                await session.close()
+
+    def _get_session(self) -> ClientSession:
+        """Return the session used for requests, creating a pooled one if needed."""
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                timeout=ClientTimeout(total=DEFAULT_TIMEOUT),
+                connector=TCPConnector(
+                    limit_per_host=DEFAULT_LIMIT_PER_HOST,
+                    ttl_dns_cache=DEFAULT_DNS_CACHE_TTL,
+                    keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+                ),
+            )
+            self._owns_session = True
+        return self._session
+
+    async def close(self) -> None:
+        """Release MQTT resources and close the HTTP session if it was created by this object."""
+        await self.mqtt.close()
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
 
     async def _run_blocking(self, fn):
         """Run a blocking function in a thread pool executor."""
@@ -221,6 +237,10 @@ async def async_get_api(
 ) -> API:
     """Instantiate an authenticated API object.
 
+    If no ``session`` is passed, the API creates and owns one; call
+    :meth:`aiophyn.api.API.close` when done with the object to close it and
+    shut down the MQTT client.
+
     :param session: An ``aiohttp`` ``ClientSession``
     :type session: ``aiohttp.client.ClientSession``
     :param email: A Phyn email address
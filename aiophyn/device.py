@@ -1,8 +1,19 @@
 """Define /devices endpoints."""
+import re
+from copy import deepcopy
+from time import monotonic
 from typing import Awaitable, Any, Callable, Optional
 
 from .const import API_BASE
 
+FIRMWARE_CACHE_TTL: int = 3600
+PREFERENCES_CACHE_TTL: int = 60
+
+_DURATION_RE = re.compile(r'\d{4}(/\d{2}(/\d{2})?)?')
+
+_AWAY_ON: dict[str, str] = {"name": "leak_sensitivity_away_mode", "value": "true"}
+_AWAY_OFF: dict[str, str] = {"name": "leak_sensitivity_away_mode", "value": "false"}
+
 
 class Device:
     """Define an object to handle the endpoints."""
@@ -10,6 +21,26 @@ class Device:
     def __init__(self, request: Callable[..., Awaitable]) -> None:
         """Initialize."""
         self._request: Callable[..., Awaitable] = request
+        self._cache: dict[tuple[str, str], tuple[float, Any]] = {}
+        self._cache_generation: dict[tuple[str, str], int] = {}
+
+    async def _cached(self, key: tuple[str, str], ttl: int, coro_factory: Callable[[], Awaitable]) -> Any:
+        """Return a copy of a cached response, or request and cache it for ``ttl`` seconds."""
+        entry = self._cache.get(key)
+        if entry is not None and monotonic() < entry[0]:
+            return deepcopy(entry[1])
+        generation = self._cache_generation.get(key, 0)
+        value = await coro_factory()
+        # Don't store a response that was invalidated while it was in flight.
+        if self._cache_generation.get(key, 0) == generation:
+            self._cache[key] = (monotonic() + ttl, deepcopy(value))
+        return value
+
+    def _invalidate_preferences(self, device_id: str) -> None:
+        """Drop the cached preferences of a device."""
+        key = ("preferences", device_id)
+        self._cache.pop(key, None)
+        self._cache_generation[key] = self._cache_generation.get(key, 0) + 1
 
     async def get_state(self, device_id: str) -> dict:
         """Return state of a device.
@@ -43,8 +74,11 @@ class Device:
         :type event_count: ``bool``
         :param comparison: Include comparison data
         :type comparison: ``bool``
+        :raises ValueError: If ``duration`` is not formatted as documented
         :rtype: ``dict``
         """
+        if not _DURATION_RE.fullmatch(duration):
+            raise ValueError(f"Invalid duration {duration!r}; expected 'YYYY/MM/DD', 'YYYY/MM', or 'YYYY'")
 
         params = {
             "device_id": device_id,
@@ -52,14 +86,9 @@ class Device:
             "precision": precision,
         }
 
-        if details:
-            params["details"] = "Y"
-
-        if event_count:
-            params["event_count"] = "Y"
-
-        if comparison:
-            params["comparison"] = "Y"
+        for key, enabled in (("details", details), ("event_count", event_count), ("comparison", comparison)):
+            if enabled:
+                params[key] = "Y"
 
         return await self._request(
             "get", f"{API_BASE}/devices/{device_id}/consumption/details", params=params
@@ -127,16 +156,12 @@ class Device:
         :type device_id: ``str``
         :rtype: ``dict``
         """
-        data = [
-            {
-                "name": "leak_sensitivity_away_mode",
-                "value": "true",
-                "device_id": device_id,
-            }
-        ]
-        return await self._request(
+        data = [{**_AWAY_ON, "device_id": device_id}]
+        resp = await self._request(
             "post", f"{API_BASE}/preferences/device/{device_id}", json=data
         )
+        self._invalidate_preferences(device_id)
+        return resp
 
     async def disable_away_mode(self, device_id: str) -> None:
         """Disable the device's away mode.
@@ -145,16 +170,12 @@ class Device:
         :type device_id: ``str``
         :rtype: ``dict``
         """
-        data = [
-            {
-                "name": "leak_sensitivity_away_mode",
-                "value": "false",
-                "device_id": device_id,
-            }
-        ]
-        return await self._request(
+        data = [{**_AWAY_OFF, "device_id": device_id}]
+        resp = await self._request(
             "post", f"{API_BASE}/preferences/device/{device_id}", json=data
         )
+        self._invalidate_preferences(device_id)
+        return resp
     
     async def get_autoshuftoff_status(self, device_id: str) -> dict:
         """Get phyn device preferences.
@@ -177,8 +198,10 @@ class Device:
         :return: List of dicts with the following keys: created_ts, device_id, name, updated_ts, value
         :rtype: dict
         """
-        return await self._request(
-            "get", f"{API_BASE}/preferences/device/{device_id}"
+        return await self._cached(
+            ("preferences", device_id),
+            PREFERENCES_CACHE_TTL,
+            lambda: self._request("get", f"{API_BASE}/preferences/device/{device_id}"),
         )
     
     async def get_health_tests(self, device_id: str) -> dict:
@@ -189,8 +212,10 @@ class Device:
         :return: List of dicts with the following keys
         :rtype: dict
         """
+        params = {"list_type": "grouped"}
+
         return await self._request(
-            "get", f"{API_BASE}/devices/{device_id}/health_tests?list_type=grouped"
+            "get", f"{API_BASE}/devices/{device_id}/health_tests", params=params
         )
     
     async def get_latest_firmware_info(self, device_id: str) -> dict:
@@ -201,8 +226,12 @@ class Device:
         :return: Returns dict with fw_img_name, fw_version, product_code
         :rtype: dict
         """
-        return await self._request(
-            "get", f"{API_BASE}/firmware/latestVersion/v2?device_id={device_id}"
+        params = {"device_id": device_id}
+
+        return await self._cached(
+            ("firmware", device_id),
+            FIRMWARE_CACHE_TTL,
+            lambda: self._request("get", f"{API_BASE}/firmware/latestVersion/v2", params=params),
         )
 
     async def run_leak_test(self, device_id: str, extended_test: bool = False):
@@ -252,6 +281,8 @@ class Device:
         :param data: List of dicts which have the keys: device_id, name, value
         :type data: List[dict]
         """
-        return await self._request(
+        resp = await self._request(
             "post", f"{API_BASE}/preferences/device/{device_id}", json=data
         )
+        self._invalidate_preferences(device_id)
+        return resp
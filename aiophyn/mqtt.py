@@ -3,22 +3,35 @@
 import asyncio
 import logging
 
+from concurrent.futures import ThreadPoolExecutor
+from inspect import isawaitable, iscoroutinefunction
 from typing import Any, Dict, Union, Optional
+from urllib.parse import quote_plus
 
-import inspect
-import json
 import time
-import urllib
 import ssl
 import socket
 import re
 import socks
 import paho.mqtt.client as paho_mqtt
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 from .const import API_BASE
 
 _LOGGER = logging.getLogger(__name__)
 
+_WSS_RE = re.compile(r'wss://([A-Za-z0-9.\-]+)(/mqtt.*)')
+
+DEVICE_TOPIC_PREFIX: str = "prd/app_subscriptions/"
+
+MESSAGE_QUEUE_SIZE: int = 1024
+# A single worker keeps update handlers seeing messages in arrival order.
+MESSAGE_WORKERS: int = 1
+
 class AIOHelper:
     """Helper class for Asynchronous IO"""
     def __init__(self, client: paho_mqtt.Client) -> None:
@@ -84,8 +97,11 @@ class Timer:
     async def _job(self, timeout):
         """ Run the job with a timeout """
         await asyncio.sleep(timeout)
+        # Detach before running the callback so that a callback which
+        # restarts the timer doesn't cancel or lose track of the new job.
+        self._task = None
         _LOGGER.debug("Executing timer callback")
-        if inspect.iscoroutinefunction(self._callback):
+        if iscoroutinefunction(self._callback):
             await self._callback()
         else:
             self._callback()
@@ -98,8 +114,7 @@ class Timer:
 
     def start(self, timeout):
         """ Start a timer task """
-        if self._task is not None:
-            self._task.cancel()
+        self.cancel()
         _LOGGER.debug("Starting timer job for %s seconds", timeout)
         self._task = asyncio.create_task(self._job(timeout))
 
@@ -108,20 +123,27 @@ class MQTTClient:
     def __init__(self, api, client_id: str =None, verify_ssl: bool =True, proxy: str =None, proxy_port: int =None):
         self.event_loop = asyncio.get_running_loop()
         self.api = api
-        self.pending_acks = {}
-        self.topics = []
+        # SUBSCRIBE message id -> topic (subscribe) or list of topics (subscribe_many)
+        self.pending_acks: dict[int, Union[str, list[str]]] = {}
+        self.topics: set[str] = set()
         self.connect_evt: asyncio.Event = asyncio.Event()
         self.connect_task = None
         self.disconnect_evt: Optional[asyncio.Event] = None
         self.reconnect_evt: asyncio.Event = asyncio.Event()
         self.host = None 
         self.port = 443
+        self._msg_queue: asyncio.Queue = asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+        self._workers: list[asyncio.Task] = []
+        self._topic_device: dict[str, Optional[str]] = {}
 
         if client_id is None:
             client_id = "aiophyn-%s" % int(time.time())
 
         self.client = paho_mqtt.Client(client_id=client_id, transport="websockets")
         self.helper: AIOHelper = None
+        # paho's connect() does the TCP/TLS/WebSocket handshake synchronously.
+        # Run it on our own thread rather than the loop's shared default executor.
+        self._connect_executor: Optional[ThreadPoolExecutor] = None
         self.reconnect_timer = Timer(self._process_reconnect)
 
         self.verify_ssl: bool = verify_ssl
@@ -167,37 +189,108 @@ class MQTTClient:
             self.client.proxy_set(proxy_type=socks.HTTP, proxy_addr=self.proxy, proxy_port=self.proxy_port)
 
         self.helper = AIOHelper(self.client)
+        self._start_workers()
         _LOGGER.info("Connecting to mqtt websocket: %s", self.host)
         self.reconnect_timer.start(5)
+        await self._connect_socket()
+
+    async def _connect_socket(self):
+        """Open the MQTT connection without blocking the event loop"""
+        if self._connect_executor is None:
+            self._connect_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aiophyn-mqtt")
         await self.event_loop.run_in_executor(
-                None,
+                self._connect_executor,
                 self.client.connect,
                 self.host,
                 self.port,
             )
-    
+
     def disconnect(self):
         """Disconnect from server"""
         self.disconnect_evt = asyncio.Event()
         _LOGGER.info("MQTT client disconnecting...")
         self.client.disconnect()
+        self.reconnect_timer.cancel()
+        self._stop_workers()
+        self._shutdown_connect_executor()
+
+    async def close(self):
+        """Disconnect if needed and release the client's background resources"""
+        self.reconnect_timer.cancel()
+        connect_task = self.connect_task
+        if connect_task is not None and not connect_task.done():
+            connect_task.cancel()
+            # Let its cleanup run now so it can't reset disconnect_evt later.
+            await asyncio.wait([connect_task])
+        if self.is_connected():
+            self.disconnect()
+        else:
+            self._stop_workers()
+            self._shutdown_connect_executor()
+
+    def _shutdown_connect_executor(self):
+        """Stop the connect thread; it is recreated by the next connect"""
+        if self._connect_executor is not None:
+            self._connect_executor.shutdown(wait=False)
+            self._connect_executor = None
     
     async def disconnect_and_wait(self):
         """Disconnect from server and wait"""
         self.disconnect()
         await self.disconnect_evt.wait()
 
+    def _start_workers(self):
+        """Start the tasks which dispatch received messages to update handlers"""
+        self._workers = [w for w in self._workers if not w.done()]
+        if not self._workers:
+            # Anything queued while no worker was running (including messages
+            # read after disconnect()) is stale by now, so drop it.
+            while not self._msg_queue.empty():
+                self._msg_queue.get_nowait()
+                self._msg_queue.task_done()
+        while len(self._workers) < MESSAGE_WORKERS:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    def _stop_workers(self):
+        """Stop the message dispatch tasks"""
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+    async def _worker(self):
+        """Dispatch queued messages to the update handlers"""
+        while True:
+            device_id, data = await self._msg_queue.get()
+            try:
+                # Call each handler separately so one that raises or returns a
+                # non-awaitable can't keep the others from running.
+                pending = []
+                for h in self._handlers["update"]:
+                    try:
+                        res = h(device_id, data)
+                    except Exception:
+                        _LOGGER.exception("Error in MQTT update handler for %s", device_id)
+                        continue
+                    if isawaitable(res):
+                        pending.append(res)
+                results = await asyncio.gather(*pending, return_exceptions=True)
+                for res in results:
+                    if isinstance(res, Exception):
+                        _LOGGER.error("Error in MQTT update handler for %s", device_id, exc_info=res)
+            finally:
+                self._msg_queue.task_done()
+
     async def get_mqtt_info(self):
         """ Gets WebSocket URL and parameters for a MQTT connection
             Returns a list of url and path
         """
-        user_id = urllib.parse.quote_plus(self.api.username)
+        user_id = quote_plus(self.api.username)
         try:
             wss_data = await self.api._request("post", f"{API_BASE}/users/{user_id}/iot_policy", token_type="id")
         except Exception as err:
             raise Exception("Could not get WebSocket/MQTT url from API") from err
 
-        match = re.match(r'wss:\/\/([a-zA-Z0-9\.\-]+)(\/mqtt?.*)', wss_data['wss_url'])
+        match = _WSS_RE.match(wss_data['wss_url'])
         if not match:
             raise Exception("Could not find WebSocket/MQTT url")
 
@@ -210,6 +303,14 @@ class MQTTClient:
         res, msg_id = self.client.subscribe(topic, 0)
         self.pending_acks[msg_id] = topic
 
+    async def subscribe_many(self, topics: list[str]):
+        """Subscribe to several MQTT topics with a single SUBSCRIBE packet"""
+        if not topics:
+            return
+        _LOGGER.info("Attempting to subscribe to: %s", topics)
+        res, msg_id = self.client.subscribe([(topic, 0) for topic in topics])
+        self.pending_acks[msg_id] = topics
+
 
     def _on_connect(self,
                     client: paho_mqtt.Client,
@@ -239,13 +340,13 @@ class MQTTClient:
                        properties: Optional[paho_mqtt.Properties] = None
                        ) -> None:
         # pylint: disable=unused-argument
+        self.reconnect_timer.cancel()
         if self.disconnect_evt is not None:
             self.disconnect_evt.set()
             _LOGGER.info("Client disconnected, not attempting to reconnect")
         elif not self.is_connected():
             # The server connection was dropped, attempt to reconnect
             _LOGGER.info("MQTT Server Disconnected, reason: %s", paho_mqtt.error_string(reason_code))
-            self.reconnect_timer.cancel()
             if self.connect_task is None or self.connect_task.done():
                 self.connect_task = asyncio.create_task(self._do_reconnect(True))
         self.connect_evt.clear()
@@ -313,12 +414,7 @@ class MQTTClient:
                     self.host, path = await self.get_mqtt_info()
                     self.client.ws_set_options(path, headers={'Host': self.host})
                     _LOGGER.info("Attempting to reconnnect...")
-                    await self.event_loop.run_in_executor(
-                            None,
-                            self.client.connect,
-                            self.host,
-                            self.port,
-                        )
+                    await self._connect_socket()
 
                     await asyncio.wait_for(self.connect_evt.wait(), timeout=2.)
                     if not self.connect_evt.is_set():
@@ -326,9 +422,7 @@ class MQTTClient:
                         continue
 
                     # Re-subscribe to all topics
-                    topics = list(set(self.topics))
-                    tasks = [self.subscribe(topic) for topic in topics]
-                    await asyncio.gather(*tasks)
+                    await self.subscribe_many(list(self.topics))
                 except asyncio.CancelledError:
                     raise
                 except Exception as e:
@@ -344,24 +438,35 @@ class MQTTClient:
             self.disconnect_evt = None
             self.connect_task = None
 
+    def _cache_topic_device(self, topic: str) -> Optional[str]:
+        """Resolve and remember the device id a topic refers to"""
+        if topic.startswith(DEVICE_TOPIC_PREFIX):
+            device_id = topic[len(DEVICE_TOPIC_PREFIX):].partition('/')[0]
+        else:
+            device_id = None
+        self._topic_device[topic] = device_id
+        return device_id
+
     def _on_message(
         self, client: paho_mqtt.Client, userdata: Any, message: paho_mqtt.MQTTMessage
     ) -> None:
         # pylint: disable=unused-argument
-        msg = message.payload.decode()
-        _LOGGER.debug("Message received on %s: %s", message.topic, msg)
+        _LOGGER.debug("Message received on %s: %r", message.topic, message.payload)
         try:
-            data = json.loads(msg)
-        except json.decoder.JSONDecodeError:
-            _LOGGER.info("Received invalid JSON message: %s", msg)
+            data = json_loads(message.payload)
+        except ValueError:
+            _LOGGER.info("Received invalid JSON message: %r", message.payload)
+            return
 
-        if message.topic.startswith("prd/app_subscriptions/"):
-            device_id = message.topic.split('/')[2]
-        else:
-            device_id = None
+        try:
+            device_id = self._topic_device[message.topic]
+        except KeyError:
+            device_id = self._cache_topic_device(message.topic)
 
-        for h in self._handlers["update"]:
-            asyncio.ensure_future(h(device_id, data))
+        try:
+            self._msg_queue.put_nowait((device_id, data))
+        except asyncio.QueueFull:
+            _LOGGER.warning("MQTT message queue full, dropping message for %s", device_id)
 
     def _on_subscribe(
         self,
@@ -372,9 +477,13 @@ class MQTTClient:
         properties: paho_mqtt.Properties | None = None,
     ) -> None:
         # pylint: disable=unused-argument
-        if mid in self.pending_acks:
-            _LOGGER.info("Subscribed to: %s", self.pending_acks[mid])
-            self.topics.append(self.pending_acks[mid])
-            del self.pending_acks[mid]
-        else:
-            _LOGGER.info("Subscribed: %s %s %s", userdata, str(mid), str(granted_qos))
+        topics = self.pending_acks.pop(mid, None)
+        if topics is None:
+            _LOGGER.info("Subscribed (unknown mid): userdata=%s mid=%d qos=%s", userdata, mid, granted_qos)
+            return
+        if isinstance(topics, str):
+            topics = [topics]
+        for topic in topics:
+            _LOGGER.info("Subscribed to: %s", topic)
+            self.topics.add(topic)
+            self._cache_topic_device(topic)
@@ -11,19 +11,13 @@ _LOGGER = logging.getLogger()
 
 
 async def device_dump(username: str, password: str) -> None:
-    device_states = []
-    away_mode_states = []
     async with ClientSession() as session:
         try:
             api = await async_get_api(username, password, session=session)
             all_homes = await api.home.get_homes(username)
-            for home in all_homes:
-                for device_id in home.get("device_ids", []):
-                    device_state = await api.device.get_state(device_id)
-                    device_states.append(device_state)
-
-                    away_mode = await api.device.get_away_mode(device_id)
-                    away_mode_states.append(away_mode)
+            device_ids = [device_id for home in all_homes for device_id in home.get("device_ids", [])]
+            device_states = await asyncio.gather(*[api.device.get_state(d) for d in device_ids])
+            away_mode_states = await asyncio.gather(*[api.device.get_away_mode(d) for d in device_ids])
             print("\n" * 3)
             pprint(device_states)
             print("\n" * 3)
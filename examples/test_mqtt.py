@@ -10,6 +10,11 @@ try:
 except ImportError:
     raise SystemExit("Copy examples/config.example to examples/config.py and fill in your credentials.")
 
+try:
+    from uvloop import run
+except ImportError:
+    from asyncio import run
+
 _LOGGER = logging.getLogger()
 
 
@@ -41,17 +46,20 @@ async def main() -> None:
         await api.mqtt.add_event_handler("update", on_message)
         await api.mqtt.connect()
 
-        for device in home_info['devices']:
-            if device['product_code'] in ['PP1','PP2']:
-                _LOGGER.info("Found Phyn Plus: %s", device)
-                await api.mqtt.subscribe(f"prd/app_subscriptions/{device['device_id']}")
+        phyn_plus_devices = [d for d in home_info['devices'] if d['product_code'] in {'PP1', 'PP2'}]
+        for device in phyn_plus_devices:
+            _LOGGER.info("Found Phyn Plus: %s", device)
+        await asyncio.gather(
+            *[api.mqtt.subscribe(f"prd/app_subscriptions/{d['device_id']}") for d in phyn_plus_devices]
+        )
 
         await asyncio.sleep(10)
 
         await api.mqtt.disconnect_and_wait()
+        await api.close()
 
     except PhynError as err:
         _LOGGER.error("There was an error: %s", err)
 
 
-asyncio.run(main())
+run(main())